@@ -1,4 +1,5 @@
 from psutil import virtual_memory
+from multiprocessing.pool import ThreadPool
 import os
 
 def get_max_memory(minimum = 5, use_at_most = 0.5):
@@ -16,3 +17,40 @@ def get_max_memory_mb(minimum = 100, use_at_most = 0.5):
     :return value of memory to use in megabytes.
     """
     return max(minimum, (virtual_memory().available / 1024 / 1024) * use_at_most)
+
+def parallel_map(func, items, max_workers=1):
+    """
+    Call func on each item, running up to max_workers calls at once from threads
+    of this process. Once a call fails, the calls that have not started yet are skipped
+    and the first error is raised after the running ones are done.
+    :param func function to call, it should release the GIL (e.g. by waiting on a subprocess)
+    :param items list of arguments, one per call
+    :param max_workers maximum number of concurrent calls
+    :return list with the return value of each call, in the order of items
+    """
+    errors = []
+
+    def call(item):
+        if errors:
+            return None
+        try:
+            return func(item)
+        except Exception as e:
+            errors.append(e)
+            raise
+
+    pool = ThreadPool(max(1, max_workers))
+    try:
+        result = pool.map_async(call, items, chunksize=1)
+
+        # Wait with a timeout, a blocking wait cannot be
+        # interrupted by signals on Python 2
+        while not result.ready():
+            result.wait(1)
+
+        if errors:
+            raise errors[0]
+        return result.get()
+    finally:
+        pool.close()
+        pool.join()
@@ -564,7 +564,7 @@ def config(argv=None):
                         default=1,
                         type=int,
                         help='Decimate the points before generating the DEM. 1 is no decimation (full quality). '
-                             '100 decimates ~99%% of the points. Useful for speeding up '
+                             '100 keeps ~1%% of the points, thinned to a uniform density. Useful for speeding up '
                              'generation.\nDefault=%(default)s')
     
     parser.add_argument('--dem-euclidean-map',
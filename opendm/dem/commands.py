@@ -80,6 +80,18 @@ def create_dem(input_point_cloud, dem_type, output_type='max', radiuses=['0.56']
                 verbose=False, decimation=None, keep_unfilled_copy=False,
                 apply_smoothing=True):
     """ Create DEM from multiple radii, and optionally gapfill """
+    create_dems(input_point_cloud, [(dem_type, output_type)], radiuses=radiuses, gapfill=gapfill,
+                outdir=outdir, resolution=resolution, max_workers=max_workers, max_tile_size=max_tile_size,
+                verbose=verbose, decimation=decimation, keep_unfilled_copy=keep_unfilled_copy,
+                apply_smoothing=apply_smoothing)
+
+def create_dems(input_point_cloud, products, radiuses=['0.56'], gapfill=True,
+                outdir='', resolution=0.1, max_workers=1, max_tile_size=4096,
+                verbose=False, decimation=None, keep_unfilled_copy=False,
+                apply_smoothing=True):
+    """ Create one or more DEMs from multiple radii, and optionally gapfill.
+    products is a list of (dem_type, output_type) tuples. The point cloud is read
+    only once per tile, for all products. """
     global error
     error = None
 
@@ -142,7 +154,9 @@ def create_dem(input_point_cloud, dem_type, output_type='max', radiuses=['0.56']
                 else:
                     maxy = miny + tile_bounds_height
 
-                filename = os.path.join(os.path.abspath(outdir), '%s_r%s_x%s_y%s.tif' % (dem_type, r, x, y))
+                filenames = {}
+                for dem_type, _ in products:
+                    filenames[dem_type] = os.path.join(os.path.abspath(outdir), '%s_r%s_x%s_y%s.tif' % (dem_type, r, x, y))
 
                 tiles.append({
                     'radius': r,
@@ -152,7 +166,7 @@ def create_dem(input_point_cloud, dem_type, output_type='max', radiuses=['0.56']
                         'miny': miny,
                         'maxy': maxy 
                     },
-                    'filename': filename
+                    'filenames': filenames
                 })
 
                 miny = maxy
@@ -161,21 +175,41 @@ def create_dem(input_point_cloud, dem_type, output_type='max', radiuses=['0.56']
     # Sort tiles by increasing radius
     tiles.sort(key=lambda t: float(t['radius']), reverse=True)
 
-    def process_one(q):
-        log.ODM_INFO("Generating %s (%s, radius: %s, resolution: %s)" % (q['filename'], output_type, q['radius'], resolution))
-        
-        d = pdal.json_gdal_base(q['filename'], output_type, q['radius'], resolution, q['bounds'])
-
-        if dem_type == 'dsm':
-            d = pdal.json_add_classification_filter(d, 2, equality='max')
-        elif dem_type == 'dtm':
-            d = pdal.json_add_classification_filter(d, 2)
-
-        if decimation is not None:
-            d = pdal.json_add_decimation_filter(d, decimation)
+    # Thin the points to a uniform density instead of keeping
+    # every Nth point, which over-thins sparse areas. filters.sample
+    # is not streamable and needs all points, so do it once for all tiles
+    tiles_point_cloud = input_point_cloud
+    sampled_point_cloud = None
+    step_decimation = None
+    if decimation is not None and decimation > 1:
+        sample_radius = pdal.decimation_sample_radius(decimation, pdal.point_count(input_point_cloud), ext_width * ext_height)
+        if sample_radius is not None:
+            log.ODM_INFO("Thinning points to a %s sampling radius (decimation: %s)" % (sample_radius, decimation))
+            sampled_point_cloud = os.path.join(os.path.abspath(outdir), 'sampled.laz')
+            pdal.run_poisson_sample(input_point_cloud, sampled_point_cloud, sample_radius, verbose=verbose)
+            tiles_point_cloud = sampled_point_cloud
+        else:
+            # Unknown point count
+            step_decimation = decimation
 
-        pdal.json_add_readers(d, [input_point_cloud])
-        pdal.run_pipeline(d, verbose=verbose)
+    def process_one(q):
+        outputs = []
+        for dem_type, output_type in products:
+            log.ODM_INFO("Generating %s (%s, radius: %s, resolution: %s)" % (q['filenames'][dem_type], output_type, q['radius'], resolution))
+
+            o = {
+                'filename': q['filenames'][dem_type],
+                'output_type': output_type
+            }
+            if dem_type == 'dsm':
+                o['limits'] = pdal.classification_limits(2, equality='max')
+            elif dem_type == 'dtm':
+                o['limits'] = pdal.classification_limits(2)
+            outputs.append(o)
+
+        for d in pdal.json_gdal_pipelines([tiles_point_cloud], outputs, q['radius'], resolution, q['bounds'],
+                                          decimation=step_decimation):
+            pdal.run_pipeline(d, verbose=verbose)
 
     def worker():
         global error
@@ -235,90 +269,95 @@ def create_dem(input_point_cloud, dem_type, output_type='max', radiuses=['0.56']
         for q in tiles:
             process_one(q)
 
-    output_file = "%s.tif" % dem_type
-    output_path = os.path.abspath(os.path.join(outdir, output_file))
+    if sampled_point_cloud is not None and os.path.exists(sampled_point_cloud):
+        os.remove(sampled_point_cloud)
 
-    # Verify tile results
-    for t in tiles: 
-        if not os.path.exists(t['filename']):
-            raise Exception("Error creating %s, %s failed to be created" % (output_file, t['filename']))
-    
-    # Create virtual raster
-    tiles_vrt_path = os.path.abspath(os.path.join(outdir, "tiles.vrt"))
-    run('gdalbuildvrt "%s" "%s"' % (tiles_vrt_path, '" "'.join(map(lambda t: t['filename'], tiles))))
-
-    merged_vrt_path = os.path.abspath(os.path.join(outdir, "merged.vrt"))
-    geotiff_tmp_path = os.path.abspath(os.path.join(outdir, 'tiles.tmp.tif'))
-    geotiff_small_path = os.path.abspath(os.path.join(outdir, 'tiles.small.tif'))
-    geotiff_small_filled_path = os.path.abspath(os.path.join(outdir, 'tiles.small_filled.tif'))
-    geotiff_path = os.path.abspath(os.path.join(outdir, 'tiles.tif'))
-
-    # Build GeoTIFF
-    kwargs = {
-        'max_memory': get_max_memory(),
-        'threads': max_workers if max_workers else 'ALL_CPUS',
-        'tiles_vrt': tiles_vrt_path,
-        'merged_vrt': merged_vrt_path,
-        'geotiff': geotiff_path,
-        'geotiff_tmp': geotiff_tmp_path,
-        'geotiff_small': geotiff_small_path,
-        'geotiff_small_filled': geotiff_small_filled_path
-    }
-
-    if gapfill:
-        # Sometimes, for some reason gdal_fillnodata.py
-        # behaves strangely when reading data directly from a .VRT
-        # so we need to convert to GeoTIFF first.
-        run('gdal_translate '
+    for dem_type, _ in products:
+        output_file = "%s.tif" % dem_type
+        output_path = os.path.abspath(os.path.join(outdir, output_file))
+        tile_filenames = [t['filenames'][dem_type] for t in tiles]
+
+        # Verify tile results
+        for f in tile_filenames: 
+            if not os.path.exists(f):
+                raise Exception("Error creating %s, %s failed to be created" % (output_file, f))
+        
+        # Create virtual raster
+        tiles_vrt_path = os.path.abspath(os.path.join(outdir, "tiles.vrt"))
+        run('gdalbuildvrt "%s" "%s"' % (tiles_vrt_path, '" "'.join(tile_filenames)))
+
+        merged_vrt_path = os.path.abspath(os.path.join(outdir, "merged.vrt"))
+        geotiff_tmp_path = os.path.abspath(os.path.join(outdir, 'tiles.tmp.tif'))
+        geotiff_small_path = os.path.abspath(os.path.join(outdir, 'tiles.small.tif'))
+        geotiff_small_filled_path = os.path.abspath(os.path.join(outdir, 'tiles.small_filled.tif'))
+        geotiff_path = os.path.abspath(os.path.join(outdir, 'tiles.tif'))
+
+        # Build GeoTIFF
+        kwargs = {
+            'max_memory': get_max_memory(),
+            'threads': max_workers if max_workers else 'ALL_CPUS',
+            'tiles_vrt': tiles_vrt_path,
+            'merged_vrt': merged_vrt_path,
+            'geotiff': geotiff_path,
+            'geotiff_tmp': geotiff_tmp_path,
+            'geotiff_small': geotiff_small_path,
+            'geotiff_small_filled': geotiff_small_filled_path
+        }
+
+        if gapfill:
+            # Sometimes, for some reason gdal_fillnodata.py
+            # behaves strangely when reading data directly from a .VRT
+            # so we need to convert to GeoTIFF first.
+            run('gdal_translate '
+                    '-co NUM_THREADS={threads} '
+                    '--config GDAL_CACHEMAX {max_memory}% '
+                    '{tiles_vrt} {geotiff_tmp}'.format(**kwargs))
+
+            # Scale to 10% size
+            run('gdal_translate '
                 '-co NUM_THREADS={threads} '
                 '--config GDAL_CACHEMAX {max_memory}% '
-                '{tiles_vrt} {geotiff_tmp}'.format(**kwargs))
-
-        # Scale to 10% size
-        run('gdal_translate '
-            '-co NUM_THREADS={threads} '
-            '--config GDAL_CACHEMAX {max_memory}% '
-            '-outsize 10% 0 '
-            '{geotiff_tmp} {geotiff_small}'.format(**kwargs))
-
-        # Fill scaled
-        run('gdal_fillnodata.py '
-            '-co NUM_THREADS={threads} '
-            '--config GDAL_CACHEMAX {max_memory}% '
-            '-b 1 '
-            '-of GTiff '
-            '{geotiff_small} {geotiff_small_filled}'.format(**kwargs))
-
-        # Merge filled scaled DEM with unfilled DEM using bilinear interpolation
-        run('gdalbuildvrt -resolution highest -r bilinear "%s" "%s" "%s"' % (merged_vrt_path, geotiff_small_filled_path, geotiff_tmp_path))
-        run('gdal_translate '
-            '-co NUM_THREADS={threads} '
-            '--config GDAL_CACHEMAX {max_memory}% '
-            '{merged_vrt} {geotiff}'.format(**kwargs))
-    else:
-        run('gdal_translate '
+                '-outsize 10% 0 '
+                '{geotiff_tmp} {geotiff_small}'.format(**kwargs))
+
+            # Fill scaled
+            run('gdal_fillnodata.py '
                 '-co NUM_THREADS={threads} '
                 '--config GDAL_CACHEMAX {max_memory}% '
-                '{tiles_vrt} {geotiff}'.format(**kwargs))
-
-    if apply_smoothing:
-        median_smoothing(geotiff_path, output_path)
-        os.remove(geotiff_path)
-    else:
-        os.rename(geotiff_path, output_path)
+                '-b 1 '
+                '-of GTiff '
+                '{geotiff_small} {geotiff_small_filled}'.format(**kwargs))
 
-    if os.path.exists(geotiff_tmp_path):
-        if not keep_unfilled_copy: 
-            os.remove(geotiff_tmp_path)
+            # Merge filled scaled DEM with unfilled DEM using bilinear interpolation
+            run('gdalbuildvrt -resolution highest -r bilinear "%s" "%s" "%s"' % (merged_vrt_path, geotiff_small_filled_path, geotiff_tmp_path))
+            run('gdal_translate '
+                '-co NUM_THREADS={threads} '
+                '--config GDAL_CACHEMAX {max_memory}% '
+                '{merged_vrt} {geotiff}'.format(**kwargs))
         else:
-            os.rename(geotiff_tmp_path, io.related_file_path(output_path, postfix=".unfilled"))
-    
-    for cleanup_file in [tiles_vrt_path, merged_vrt_path, geotiff_small_path, geotiff_small_filled_path]:
-        if os.path.exists(cleanup_file): os.remove(cleanup_file)
-    for t in tiles:
-        if os.path.exists(t['filename']): os.remove(t['filename'])
-    
-    log.ODM_INFO('Completed %s in %s' % (output_file, datetime.now() - start))
+            run('gdal_translate '
+                    '-co NUM_THREADS={threads} '
+                    '--config GDAL_CACHEMAX {max_memory}% '
+                    '{tiles_vrt} {geotiff}'.format(**kwargs))
+
+        if apply_smoothing:
+            median_smoothing(geotiff_path, output_path)
+            os.remove(geotiff_path)
+        else:
+            os.rename(geotiff_path, output_path)
+
+        if os.path.exists(geotiff_tmp_path):
+            if not keep_unfilled_copy: 
+                os.remove(geotiff_tmp_path)
+            else:
+                os.rename(geotiff_tmp_path, io.related_file_path(output_path, postfix=".unfilled"))
+        
+        for cleanup_file in [tiles_vrt_path, merged_vrt_path, geotiff_small_path, geotiff_small_filled_path]:
+            if os.path.exists(cleanup_file): os.remove(cleanup_file)
+        for f in tile_filenames:
+            if os.path.exists(f): os.remove(f)
+        
+        log.ODM_INFO('Completed %s in %s' % (output_file, datetime.now() - start))
 
 
 def compute_euclidean_map(geotiff_path, output_path, overwrite=False):
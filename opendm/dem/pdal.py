@@ -30,108 +30,336 @@
 
 # Library functions for creating DEMs from Lidar data
 
+from __future__ import absolute_import
 import os
+import math
+import struct
 import json as jsonlib
 import tempfile
 from opendm import system
 from opendm import log
 
 from datetime import datetime
-from pipes import quote
+
+try:
+    # PDAL Python bindings (optional), used to run
+    # pipelines in-process instead of forking a pdal process
+    import pdal as pdal_bindings
+except ImportError:
+    pdal_bindings = None
+
+try:
+    # Faster JSON serialization (optional)
+    import orjson
+except ImportError:
+    orjson = None
 
 
 """ JSON Functions """
 
+# Constant part of the pipeline elements,
+# copied and completed by the functions below
+LAS_READER_TPL = {'type': 'readers.las'}
+PLY_READER_TPL = {'type': 'readers.ply'}
+EPT_READER_TPL = {'type': 'readers.ept'}
+GDAL_WRITER_TPL = {'type': 'writers.gdal', 'data_type': 'float'}
+LAS_WRITER_TPL = {'type': 'writers.las'}
+SMRF_TPL = {'type': 'filters.smrf'}
+DECIMATION_TPL = {'type': 'filters.decimation'}
+SAMPLE_TPL = {'type': 'filters.sample'}
+RANGE_TPL = {'type': 'filters.range'}
+MERGE_TPL = {'type': 'filters.merge'}
+
 
 def json_base():
-    """ Create initial JSON for PDAL pipeline """
+    """ Create initial JSON for PDAL pipeline. Elements are
+    added in pipeline order (readers first, writers last) """
     return {'pipeline': []}
 
 
-def json_gdal_base(filename, output_type, radius, resolution=1, bounds=None):
-    """ Create initial JSON for PDAL pipeline containing a Writer element """
-    json = json_base()
-
-    d = {
-        'type': 'writers.gdal',
-        'resolution': resolution,
-        'radius': radius,
-        'filename': filename,
-        'output_type': output_type,
-        'data_type': 'float'
-    }
+def json_gdal_writer(filename, output_type, radius, resolution=1, bounds=None):
+    """ Create a GDAL Writer element """
+    d = GDAL_WRITER_TPL.copy()
+    d['resolution'] = resolution
+    d['radius'] = radius
+    d['filename'] = filename
+    d['output_type'] = output_type
 
     if bounds is not None:
-        d['bounds'] = "([%s,%s],[%s,%s])" % (bounds['minx'], bounds['maxx'], bounds['miny'], bounds['maxy'])
+        d['bounds'] = bounds_string(bounds)
 
-    json['pipeline'].insert(0, d)
+    return d
 
+
+def bounds_string(bounds):
+    """ PDAL bounds option for a {minx, maxx, miny, maxy} dict """
+    return "([%s,%s],[%s,%s])" % (bounds['minx'], bounds['maxx'], bounds['miny'], bounds['maxy'])
+
+
+def json_add_gdal_writer(json, filename, output_type, radius, resolution=1, bounds=None):
+    """ Add GDAL Writer element and return """
+    json['pipeline'].append(json_gdal_writer(filename, output_type, radius, resolution, bounds))
     return json
 
 
-def json_las_base(fout):
-    """ Create initial JSON for writing to a LAS file """
+def json_gdal_multi(filenames, outputs, radius, resolution=1, bounds=None, decimation=None):
+    """ Create JSON for a PDAL pipeline that reads (and optionally decimates) the input
+    point clouds once, then tees the points into one GDAL Writer element per output.
+    Each output is a dict with 'filename', 'output_type' and optional range 'limits'
+    (a {dimension: range} dict, see range_limits) """
     json = json_base()
-    json['pipeline'].insert(0, {
-        'type': 'writers.las',
-        'filename': fout  
-    })
+    pipeline = json['pipeline']
+
+    if len(filenames) == 1 and is_ept(filenames[0]):
+        # Only fetch the points that can contribute to the tile
+        # (the ones within radius of its cells)
+        ept_bounds = None
+        if bounds is not None:
+            r = float(radius)
+            ept_bounds = {
+                'minx': bounds['minx'] - r,
+                'maxx': bounds['maxx'] + r,
+                'miny': bounds['miny'] - r,
+                'maxy': bounds['maxy'] + r
+            }
+        json_add_ept_reader(json, filenames[0], ept_bounds)
+    else:
+        json_add_readers(json, filenames)
+
+    if decimation is not None:
+        json_add_decimation_filter(json, decimation)
+    pipeline[-1]['tag'] = 'in'
+
+    writer_tags = []
+    for i, o in enumerate(outputs):
+        inputs = ['in']
+        if o.get('limits'):
+            r = RANGE_TPL.copy()
+            r['limits'] = range_limits(o['limits'])
+            r['inputs'] = inputs
+            r['tag'] = 'range%s' % i
+            pipeline.append(r)
+            inputs = [r['tag']]
+
+        w = json_gdal_writer(o['filename'], o['output_type'], radius, resolution, bounds)
+        w['inputs'] = inputs
+        w['tag'] = 'writer%s' % i
+        pipeline.append(w)
+        writer_tags.append(w['tag'])
+
+    # PDAL executes a single endpoint, so join all
+    # writers (which pass their points through) into one
+    if len(writer_tags) > 1:
+        m = MERGE_TPL.copy()
+        m['inputs'] = writer_tags
+        pipeline.append(m)
+
+    return json
+
+
+def json_gdal_pipelines(filenames, outputs, radius, resolution=1, bounds=None, **kwargs):
+    """ Create the JSON for the PDAL pipelines writing all outputs (see json_gdal_multi),
+    one pipeline per output. The pdal CLI built by the SuperBuild (PDAL 1.9) executes the
+    inputs of each stage recursively, which would read a shared input once per output
+    (and merge copies of all branches at the end), and streaming such a branched graph
+    with the Python bindings is not known to work, so both run linear pipelines """
+    return [json_gdal_multi(filenames, [o], radius, resolution, bounds, **kwargs) for o in outputs]
+
+
+def json_add_las_writer(json, fout):
+    """ Add LAS Writer element and return """
+    d = LAS_WRITER_TPL.copy()
+    d['filename'] = fout
+
+    if os.path.splitext(fout)[1].lower() == '.laz':
+        d['compression'] = 'laszip'
+
+    json['pipeline'].append(d)
+    return json
+
+
+def json_add_smrf_filter(json, scalar, slope, threshold, window):
+    """ Add Simple Morphological Filter (ground classification) element and return """
+    d = SMRF_TPL.copy()
+    d['scalar'] = scalar
+    d['slope'] = slope
+    d['threshold'] = threshold
+    d['window'] = window
+    json['pipeline'].append(d)
     return json
 
 
 def json_add_decimation_filter(json, step):
     """ Add decimation Filter element and return """
-    json['pipeline'].insert(0, {
-            'type': 'filters.decimation',
-            'step': step
-        })
+    d = DECIMATION_TPL.copy()
+    d['step'] = step
+    json['pipeline'].append(d)
     return json
 
 
-def json_add_classification_filter(json, classification, equality="equals"):
-    """ Add classification Filter element and return """
-    limits = 'Classification[{0}:{0}]'.format(classification)
-    if equality == 'max':
-        limits = 'Classification[:{0}]'.format(classification)
+def json_add_poisson_sample(json, radius):
+    """ Add Poisson sampling Filter element (no two points
+    closer than radius) and return """
+    d = SAMPLE_TPL.copy()
+    d['radius'] = radius
+    json['pipeline'].append(d)
+    return json
+
 
-    json['pipeline'].insert(0, {
-            'type': 'filters.range',
-            'limits': limits
-        })
+def range_limits(dim_limits):
+    """ filters.range limits string for a {dimension: range} dict, e.g.
+    {'Classification': '[2:2]', 'Z': '[:100]'} -> 'Classification[2:2],Z[:100]'.
+    Ranges on different dimensions must all match. Strings are returned as-is """
+    if isinstance(dim_limits, dict):
+        return ','.join('%s%s' % (k, dim_limits[k]) for k in sorted(dim_limits.keys()))
+    return dim_limits
+
+
+def json_add_range(json, dim_limits):
+    """ Add a single range Filter element for all dimension limits and return """
+    d = RANGE_TPL.copy()
+    d['limits'] = range_limits(dim_limits)
+    json['pipeline'].append(d)
     return json
 
 
+def classification_limits(classification, equality="equals"):
+    """ Range limits selecting a classification """
+    if equality == 'max':
+        return {'Classification': '[:{0}]'.format(classification)}
+    return {'Classification': '[{0}:{0}]'.format(classification)}
+
+
+def json_add_classification_filter(json, classification, equality="equals"):
+    """ Add classification Filter element and return """
+    return json_add_range(json, classification_limits(classification, equality))
+
+
 def is_ply_file(filename):
     _, ext = os.path.splitext(filename)
     return ext.lower() == '.ply'
 
 
-def json_add_reader(json, filename):
-    """ Add Reader Element and return """
-    reader_type = 'readers.las' # default
+def is_ept(path):
+    """ Is path an Entwine Point Tile dataset (its directory or ept.json file)? """
+    if os.path.basename(path) == 'ept.json':
+        return True
+    return os.path.isdir(path) and os.path.isfile(os.path.join(path, 'ept.json'))
+
+
+def ept_json_path(path):
+    if os.path.basename(path) == 'ept.json':
+        return path
+    return os.path.join(path, 'ept.json')
+
+
+def is_ept_current(path, source):
+    """ Was the EPT dataset at path built after source was last modified? """
+    try:
+        return os.path.getmtime(ept_json_path(path)) >= os.path.getmtime(source)
+    except OSError:
+        return False
+
+
+def json_reader(filename, cwd=None):
+    """ Create a Reader element. When adding many readers, pass cwd
+    to avoid looking up the current directory for each filename.
+    EPT datasets are recognized by their ept.json filename only, so
+    that no filesystem lookup is needed """
+    d = LAS_READER_TPL.copy() # default
     if is_ply_file(filename):
-        reader_type = 'readers.ply'
+        d = PLY_READER_TPL.copy()
+    elif os.path.basename(filename) == 'ept.json':
+        d = EPT_READER_TPL.copy()
+
+    if cwd is None:
+        cwd = os.getcwd()
+
+    d['filename'] = os.path.normpath(os.path.join(cwd, filename))
+    return d
+
+
+def json_add_ept_reader(json, ept_path, bounds=None):
+    """ Add EPT Reader element, optionally only reading
+    points within bounds ({minx, maxx, miny, maxy} dict) and return """
+    d = EPT_READER_TPL.copy()
+    d['filename'] = os.path.abspath(ept_json_path(ept_path))
+    if bounds is not None:
+        d['bounds'] = bounds_string(bounds)
+
+    json['pipeline'].append(d)
+    return json
 
-    json['pipeline'].insert(0, {
-            'type': reader_type,
-            'filename': os.path.abspath(filename)
-        })
+
+def json_add_reader(json, filename):
+    """ Add Reader Element (also for an EPT dataset directory) and return """
+    if is_ept(filename):
+        filename = ept_json_path(filename)
+    json['pipeline'].append(json_reader(filename))
     return json
 
 
+def las_point_count(filename):
+    """ Read the number of points from a LAS/LAZ file header """
+    with open(filename, 'rb') as f:
+        header = f.read(255)
+
+    if len(header) < 111 or header[:4] != b'LASF':
+        raise Exception("%s is not a valid LAS/LAZ file" % filename)
+
+    version = struct.unpack('<BB', header[24:26])
+    count = struct.unpack('<I', header[107:111])[0]
+
+    # LAS 1.4 stores a 64bit count (the legacy one can be zero)
+    if version >= (1, 4) and len(header) >= 255:
+        count = max(count, struct.unpack('<Q', header[247:255])[0])
+
+    return count
+
+
+def point_count(filename):
+    """ Number of points of a LAS/LAZ file or EPT dataset, None if unknown """
+    if is_ept(filename):
+        with open(ept_json_path(filename), 'r') as f:
+            return jsonlib.loads(f.read()).get('points')
+    if is_ply_file(filename):
+        return None
+    return las_point_count(filename)
+
+
+def decimation_sample_radius(decimation, num_points, area):
+    """ Poisson sampling radius keeping about 1 / decimation of num_points
+    spread over area, or None if it cannot be estimated. Points spaced
+    sqrt(decimation) times farther apart than the average spacing are kept """
+    if not num_points or area <= 0:
+        return None
+    return math.sqrt(area * decimation / float(num_points))
+
+
 def json_add_readers(json, filenames):
-    """ Add merge Filter element and readers to a Writer element and return Filter element """
+    """ Add Reader elements followed by a merge Filter element and return """
+    cwd = os.getcwd()
     for f in filenames:
-        json_add_reader(json, f)
+        json['pipeline'].append(json_reader(f, cwd))
 
     if len(filenames) > 1:
-        json['pipeline'].insert(0, {
-                'type': 'filters.merge'
-            })
+        json['pipeline'].append(MERGE_TPL.copy())
 
     return json
 
 
+def json_dumps(json):
+    """ Serialize JSON to bytes """
+    if orjson is not None:
+        try:
+            # Resolutions computed by numpy are numpy scalars
+            return orjson.dumps(json, option=orjson.OPT_SERIALIZE_NUMPY)
+        except TypeError:
+            # orjson rejects other subclasses of the builtin types
+            pass
+    return jsonlib.dumps(json).encode('utf-8')
+
+
 def json_print(json):
     """ Pretty print JSON """
     log.ODM_DEBUG(jsonlib.dumps(json, indent=4, separators=(',', ': ')))
@@ -139,62 +367,100 @@ def json_print(json):
 
 """ Run PDAL commands """
 
+def get_env_int(name, default, minimum=0):
+    """ Read an integer tuning value from the environment """
+    try:
+        return max(minimum, int(os.environ.get(name, default)))
+    except ValueError:
+        log.ODM_WARNING("Invalid %s value: %s, using %s" % (name, os.environ.get(name), default))
+        return default
+
+
+def get_stream_chunk_size():
+    """ Number of points processed at once by streaming pipelines (ODM_DEM_CHUNK env var to override) """
+    return get_env_int('ODM_DEM_CHUNK', 100000, minimum=1)
+
+
+def get_stream_prefetch():
+    """ Number of chunks decoded ahead while streaming (ODM_DEM_PREFETCH env var to override).
+    Peak memory is roughly (prefetch + 1) * chunk size * point size. Off by default: the
+    chunks are copied to numpy arrays and readers and writers still run on the same
+    streaming thread, so nothing overlaps when the writers do all the work """
+    return get_env_int('ODM_DEM_PREFETCH', 0)
+
+
 def run_pipeline(json, verbose=False):
     """ Run PDAL Pipeline with provided JSON """
     if verbose:
         json_print(json)
 
+    # Serialize once, the bindings take the JSON string
+    # directly without going through a file
+    serialized = json_dumps(json)
+
+    if pdal_bindings is not None:
+        pipeline = pdal_bindings.Pipeline(serialized.decode('utf-8'))
+        if verbose:
+            pipeline.loglevel = 8 # debug
+
+        # Streamable pipelines process points in fixed size chunks
+        # instead of loading the entire point cloud in memory
+        if getattr(pipeline, 'streamable', False):
+            chunk_size = get_stream_chunk_size()
+            prefetch = get_stream_prefetch()
+
+            if prefetch > 0 and hasattr(pipeline, 'iterator'):
+                # The writers do the work,
+                # so the returned chunks are discarded
+                for _ in pipeline.iterator(chunk_size=chunk_size, prefetch=prefetch):
+                    pass
+            else:
+                pipeline.execute_streaming(chunk_size=chunk_size)
+        else:
+            pipeline.execute()
+        if verbose:
+            log.ODM_INFO(pipeline.log)
+        return
+
     # write to temp file
     f, jsonfile = tempfile.mkstemp(suffix='.json')
     if verbose:
         log.ODM_INFO('Pipeline file: %s' % jsonfile)
-    os.write(f, jsonlib.dumps(json))
+    os.write(f, serialized)
     os.close(f)
 
-    cmd = [
-        'pdal',
-        'pipeline',
-        '-i %s' % jsonfile
-    ]
-    if verbose:
-        system.run(' '.join(cmd))
-    else:
-        system.run(' '.join(cmd) + ' > /dev/null 2>&1')
-    os.remove(jsonfile)
+    try:
+        system.run_argv(['pdal', 'pipeline', '-i', jsonfile], devnull=not verbose)
+    finally:
+        os.remove(jsonfile)
 
 
 def run_pdaltranslate_smrf(fin, fout, scalar, slope, threshold, window, verbose=False):
-    """ Run PDAL translate  """
-    cmd = [
-        'pdal',
-        'translate',
-        '-i %s' % fin,
-        '-o %s' % fout,
-        'smrf',
-        '--filters.smrf.scalar=%s' % scalar,
-        '--filters.smrf.slope=%s' % slope,
-        '--filters.smrf.threshold=%s' % threshold,
-        '--filters.smrf.window=%s' % window,
-    ]
+    """ Classify ground points with the Simple Morphological Filter """
+    json = json_base()
+    json_add_reader(json, fin)
+    json_add_smrf_filter(json, scalar, slope, threshold, window)
+    json_add_las_writer(json, fout)
 
-    if verbose:
-        log.ODM_INFO(' '.join(cmd))
+    # filters.smrf is not streamable, so fin is fully
+    # read before fout is written (they can be the same file)
+    run_pipeline(json, verbose=verbose)
 
-    system.run(' '.join(cmd))
+def run_poisson_sample(fin, fout, radius, verbose=False):
+    """ Thin fin to a uniform density with Poisson sampling (no two
+    points closer than radius) and write the result to fout """
+    json = json_base()
+    json_add_reader(json, fin)
+    json_add_poisson_sample(json, radius)
+    json_add_las_writer(json, fout)
+
+    # Keep the scale, offset and SRS of LAS/LAZ inputs
+    json['pipeline'][-1]['forward'] = 'all'
+    run_pipeline(json, verbose=verbose)
 
 def merge_point_clouds(input_files, output_file, verbose=False):
     if len(input_files) == 0:
         log.ODM_WARNING("Cannot merge point clouds, no point clouds to merge.")
         return
 
-    cmd = [
-        'pdal',
-        'merge',
-        ' '.join(map(quote, input_files + [output_file])),
-    ]
-
-    if verbose:
-        log.ODM_INFO(' '.join(cmd))
-    
-    system.run(' '.join(cmd))
-
+    system.run_argv(['pdal', 'merge'] + input_files + [output_file])
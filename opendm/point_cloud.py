@@ -5,6 +5,7 @@ from opendm import context
 from opendm.system import run
 from opendm import entwine
 from opendm import io
+from opendm.dem import pdal
 from pipes import quote
 
 def filter(input_point_cloud, output_point_cloud, standard_deviation=2.5, meank=16, confidence=None, sample_radius=0, verbose=False):
@@ -57,6 +58,14 @@ def filter(input_point_cloud, output_point_cloud, standard_deviation=2.5, meank=
         log.ODM_WARNING("{} not found, filtering has failed.".format(output_point_cloud))
 
 def get_extent(input_point_cloud):
+    # EPT datasets store their bounds in ept.json
+    if pdal.is_ept(input_point_cloud):
+        with open(pdal.ept_json_path(input_point_cloud), 'r') as f:
+            ept = json.loads(f.read())
+        b = ept.get('boundsConforming', ept.get('bounds'))
+        if b is None: raise Exception("Cannot compute bounds for %s (bounds key missing)" % input_point_cloud)
+        return {'minx': b[0], 'miny': b[1], 'minz': b[2], 'maxx': b[3], 'maxy': b[4], 'maxz': b[5]}
+
     fd, json_file = tempfile.mkstemp(suffix='.json')
     os.close(fd)
     
@@ -55,10 +55,23 @@ signal.signal(signal.SIGTERM, sighandler)
 
 def run(cmd, env_paths=[context.superbuild_bin_path], env_vars={}):
     """Run a system command"""
-    global running_subprocesses
-
     log.ODM_INFO('running %s' % cmd)
+    wait_for(subprocess.Popen(cmd, shell=True, env=get_env(env_paths, env_vars), preexec_fn=os.setsid))
+
+
+def run_argv(cmd, env_paths=[context.superbuild_bin_path], env_vars={}, devnull=False):
+    """Run a system command without a shell.
+    cmd is a list of arguments, devnull discards stdout/stderr"""
+    log.ODM_INFO('running %s' % ' '.join(cmd))
+
+    if devnull:
+        with open(os.devnull, 'w') as null:
+            wait_for(subprocess.Popen(cmd, env=get_env(env_paths, env_vars), preexec_fn=os.setsid, stdout=null, stderr=null))
+    else:
+        wait_for(subprocess.Popen(cmd, env=get_env(env_paths, env_vars), preexec_fn=os.setsid))
 
+
+def get_env(env_paths, env_vars):
     env = os.environ.copy()
     if len(env_paths) > 0:
         env["PATH"] = env["PATH"] + ":" + ":".join(env_paths)
@@ -66,7 +79,13 @@ def run(cmd, env_paths=[context.superbuild_bin_path], env_vars={}):
     for k in env_vars:
         env[k] = str(env_vars[k])
 
-    p = subprocess.Popen(cmd, shell=True, env=env, preexec_fn=os.setsid)
+    return env
+
+
+def wait_for(p):
+    """Wait for a subprocess to finish, tracking it for signal handling"""
+    global running_subprocesses
+
     running_subprocesses.append(p)
     retcode = p.wait()
     running_subprocesses.remove(p)
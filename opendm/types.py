@@ -324,6 +324,13 @@ class ODM_Stage:
                      (self.args.rerun_all) or \
                      (self.args.rerun_from is not None and self.name in self.args.rerun_from)
     
+    def outputs_exist(self, args, tree):
+        """
+        Are the outputs of a previous run of this stage still there?
+        Stages that cannot tell always run.
+        """
+        return False
+
     def run(self, outputs = {}):
         start_time = system.now_raw()
         log.ODM_INFO('Running %s stage' % self.name)
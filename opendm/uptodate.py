@@ -0,0 +1,45 @@
+import os
+import hashlib
+
+from opendm import io
+
+# Flags that select which stages run, not how they process
+RERUN_OPTIONS = ['rerun', 'rerun_all', 'rerun_from', 'end_with', 'time']
+
+def options_hash(args):
+    """
+    :param args parsed ODM arguments
+    :return hash of the processing options, ignoring the rerun flags
+    """
+    args_dict = vars(args)
+    options = ["%s=%s" % (k, args_dict[k]) for k in sorted(args_dict.keys()) if not k.endswith("_is_set") and k not in RERUN_OPTIONS]
+    return hashlib.sha256("\n".join(options).encode('utf-8')).hexdigest()
+
+def is_up_to_date(done_file, args, stages, tree):
+    """
+    :param done_file marker written by a previous run that went through all stages
+    :param args parsed ODM arguments
+    :param stages ODM_Stage list
+    :param tree ODM_Tree of the project
+    :return True if done_file was written with the same options, no stage
+        was asked to rerun and the outputs of every stage are still there
+    """
+    if any(stage.rerun() for stage in stages):
+        return False
+
+    if not io.file_exists(done_file):
+        return False
+
+    with open(done_file, 'r') as f:
+        if f.read().strip() != options_hash(args):
+            return False
+
+    return all(stage.outputs_exist(args, tree) for stage in stages)
+
+def mark_done(done_file, args):
+    with open(done_file, 'w') as f:
+        f.write(options_hash(args))
+
+def invalidate(done_file):
+    if io.file_exists(done_file):
+        os.remove(done_file)
@@ -7,7 +7,12 @@ from opendm import io
 from opendm.progress import progressbc
 
 import os
-from pipes import quote
+import sys
+try:
+    from shlex import quote
+except ImportError:
+    # Python 2
+    from pipes import quote
 
 from stages.odm_app import ODMApp
 
@@ -58,6 +63,10 @@ if __name__ == '__main__':
                     ]))
 
     app = ODMApp(args)
+    if app.is_up_to_date():
+        log.ODM_INFO("All outputs are up to date, nothing to do (use --rerun-all to process again)")
+        sys.exit(0)
+
     app.execute()
     
     # Do not show ASCII art for local submodels runs
@@ -38,6 +38,12 @@ def load_images_database(database_file):
     return result
 
 class ODMLoadDatasetStage(types.ODM_Stage):
+    def images_database_file(self, tree):
+        return io.join_paths(tree.root_path, 'images.json')
+
+    def outputs_exist(self, args, tree):
+        return io.file_exists(self.images_database_file(tree))
+
     def process(self, args, outputs):
         tree = types.ODM_Tree(args.project_path, args.gcp)
         outputs['tree'] = tree
@@ -75,8 +81,8 @@ class ODMLoadDatasetStage(types.ODM_Stage):
         log.ODM_INFO('Loading dataset from: %s' % images_dir)
 
         # check if we rerun cell or not
-        images_database_file = io.join_paths(tree.root_path, 'images.json')
-        if not io.file_exists(images_database_file) or self.rerun():
+        images_database_file = self.images_database_file(tree)
+        if not self.outputs_exist(args, tree) or self.rerun():
             files = get_images(images_dir)
             if files:
                 # create ODMPhoto list
@@ -9,6 +9,9 @@ from opendm import types
 from opendm.osfm import OSFMContext
 
 class ODMMveStage(types.ODM_Stage):
+    def outputs_exist(self, args, tree):
+        return io.file_exists(tree.mve_model)
+
     def process(self, args, outputs):
         # get inputs
         tree = outputs['tree']
@@ -20,7 +23,7 @@ class ODMMveStage(types.ODM_Stage):
             exit(1)
 
         # check if reconstruction was done before
-        if not io.file_exists(tree.mve_model) or self.rerun():
+        if not self.outputs_exist(args, tree) or self.rerun():
             # mve makescene wants the output directory
             # to not exists before executing it (otherwise it
             # will prompt the user for confirmation)
@@ -1,4 +1,4 @@
-import os, shutil
+import os, shutil, glob
 
 from opendm import log
 from opendm import io
@@ -7,12 +7,8 @@ from opendm import context
 from opendm import types
 
 class ODMMvsTexStage(types.ODM_Stage):
-    def process(self, args, outputs):
-        tree = outputs['tree']
-        reconstruction = outputs['reconstruction']
-
-        class nonloc:
-            runs = []
+    def texturing_runs(self, args, tree, multi_camera=None):
+        runs = []
 
         def add_run(nvm_file, primary=True, band=None):
             subdir = ""
@@ -20,39 +16,57 @@ class ODMMvsTexStage(types.ODM_Stage):
                 subdir = band
 
             if not args.skip_3dmodel and (primary or args.use_3dmesh):
-                nonloc.runs += [{
+                runs.append({
                     'out_dir': os.path.join(tree.odm_texturing, subdir),
                     'model': tree.odm_mesh,
                     'nadir': False,
                     'nvm_file': nvm_file
-                }]
+                })
 
             if not args.use_3dmesh:
-                nonloc.runs += [{
+                runs.append({
                     'out_dir': os.path.join(tree.odm_25dtexturing, subdir),
                     'model': tree.odm_25dmesh,
                     'nadir': True,
                     'nvm_file': nvm_file
-                }]
+                })
 
-        if reconstruction.multi_camera:
-            for band in reconstruction.multi_camera:
-                primary = band == reconstruction.multi_camera[0]
+        if multi_camera:
+            for band in multi_camera:
+                primary = band == multi_camera[0]
                 nvm_file = os.path.join(tree.opensfm, "undistorted", "reconstruction_%s.nvm" % band['name'].lower())
                 add_run(nvm_file, primary, band['name'].lower())
         else:
             add_run(tree.opensfm_reconstruction_nvm)
 
-        progress_per_run = 100.0 / len(nonloc.runs)
+        return runs
+
+    def run_done(self, tree, r):
+        return io.file_exists(os.path.join(r['out_dir'], tree.odm_textured_model_obj))
+
+    def outputs_exist(self, args, tree):
+        # Multi camera datasets also have one output per band, not checked here
+        if glob.glob(os.path.join(tree.opensfm, "undistorted", "reconstruction_*.nvm")):
+            return False
+
+        return all(self.run_done(tree, r) for r in self.texturing_runs(args, tree))
+
+    def process(self, args, outputs):
+        tree = outputs['tree']
+        reconstruction = outputs['reconstruction']
+
+        runs = self.texturing_runs(args, tree, reconstruction.multi_camera)
+
+        progress_per_run = 100.0 / len(runs)
         progress = 0.0
 
-        for r in nonloc.runs:
+        for r in runs:
             if not io.dir_exists(r['out_dir']):
                 system.mkdir_p(r['out_dir'])
 
             odm_textured_model_obj = os.path.join(r['out_dir'], tree.odm_textured_model_obj)
 
-            if not io.file_exists(odm_textured_model_obj) or self.rerun():
+            if not self.run_done(tree, r) or self.rerun():
                 log.ODM_INFO('Writing MVS Textured file in: %s'
                               % odm_textured_model_obj)
 
@@ -130,7 +144,7 @@ class ODMMvsTexStage(types.ODM_Stage):
                                 % odm_textured_model_obj)
         
         if args.optimize_disk_space:
-            for r in nonloc.runs:
+            for r in runs:
                 if io.file_exists(r['model']):
                     os.remove(r['model'])
             
@@ -5,6 +5,7 @@ from opendm import types
 from opendm import io
 from opendm import system
 from opendm import log
+from opendm import uptodate
 
 from dataset import ODMLoadDatasetStage
 from run_opensfm import ODMOpenSfMStage
@@ -27,6 +28,9 @@ class ODMApp:
         """
         if args.debug:
             log.logger.show_debug = True
+
+        self.args = args
+        self.done_file = io.join_paths(args.project_path, 'odm_done.txt')
         
         dataset = ODMLoadDatasetStage('dataset', args, progress=5.0,
                                           verbose=args.verbose)
@@ -91,5 +95,35 @@ class ODMApp:
         #     .connect(meshing) \
         #     .connect(texturing)
 
+    def stages(self):
+        stage = self.first_stage
+        while stage is not None:
+            yield stage
+            stage = stage.next_stage
+
+    def options_hash(self):
+        """
+        Hash of the processing options, ignoring the rerun flags
+        """
+        return uptodate.options_hash(self.args)
+
+    def is_up_to_date(self):
+        """
+        Returns True if a previous run with the same options went through all
+        stages, no stage was asked to rerun and the outputs of every
+        stage are still there, in which case there's nothing to do
+        """
+        tree = types.ODM_Tree(self.args.project_path, self.args.gcp)
+        return uptodate.is_up_to_date(self.done_file, self.args, list(self.stages()), tree)
+
     def execute(self):
-        self.first_stage.run()
\ No newline at end of file
+        # Invalidate the previous run until this one completes
+        uptodate.invalidate(self.done_file)
+
+        # (stages can cut the pipeline short while running)
+        last_stage = list(self.stages())[-1]
+
+        self.first_stage.run()
+
+        if self.args.rerun is None and self.args.end_with == last_stage.name:
+            uptodate.mark_done(self.done_file, self.args)
\ No newline at end of file
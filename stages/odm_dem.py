@@ -7,11 +7,21 @@ from opendm import system
 from opendm import context
 from opendm import types
 from opendm import gsd
-from opendm.dem import commands, utils
+from opendm.dem import commands, utils, pdal
 from opendm.cropper import Cropper
 from opendm import pseudogeo
 
 class ODMDEMStage(types.ODM_Stage):
+    def classify_done(self, args, tree):
+        return not args.pc_classify or io.file_exists(tree.path('odm_dem', 'pc_classify_done.txt'))
+
+    def dems_exist(self, args, tree):
+        return (not args.dsm or io.file_exists(tree.path('odm_dem', 'dsm.tif'))) and \
+               (not args.dtm or io.file_exists(tree.path('odm_dem', 'dtm.tif')))
+
+    def outputs_exist(self, args, tree):
+        return self.classify_done(args, tree) and self.dems_exist(args, tree)
+
     def process(self, args, outputs):
         tree = outputs['tree']
         reconstruction = outputs['reconstruction']
@@ -55,7 +65,7 @@ class ODMDEMStage(types.ODM_Stage):
         if args.pc_classify and pc_model_found:
             pc_classify_marker = os.path.join(odm_dem_root, 'pc_classify_done.txt')
 
-            if not io.file_exists(pc_classify_marker) or self.rerun():
+            if not self.classify_done(args, tree) or self.rerun():
                 log.ODM_INFO("Classifying {} using Simple Morphological Filter".format(dem_input))
                 commands.classify(dem_input,
                                   args.smrf_scalar, 
@@ -78,14 +88,21 @@ class ODMDEMStage(types.ODM_Stage):
         if args.pc_rectify:
             commands.rectify(dem_input, args.debug)
 
+        # Read from the EPT output when there is one, so that each DEM tile
+        # only fetches its own points. Classification and rectification
+        # modify dem_input in place and are not reflected in the EPT.
+        if args.pc_ept and not args.pc_classify and not args.pc_rectify and \
+            not pseudo_georeference and pdal.is_ept(tree.entwine_pointcloud):
+            # The EPT can be left over from an earlier point cloud
+            if pdal.is_ept_current(tree.entwine_pointcloud, dem_input):
+                log.ODM_INFO("Using EPT point cloud %s for DEM generation" % tree.entwine_pointcloud)
+                dem_input = tree.entwine_pointcloud
+            else:
+                log.ODM_WARNING("EPT point cloud %s is older than %s, will not use it for DEM generation" % (tree.entwine_pointcloud, dem_input))
+
         # Do we need to process anything here?
         if (args.dsm or args.dtm) and pc_model_found:
-            dsm_output_filename = os.path.join(odm_dem_root, 'dsm.tif')
-            dtm_output_filename = os.path.join(odm_dem_root, 'dtm.tif')
-
-            if (args.dtm and not io.file_exists(dtm_output_filename)) or \
-                (args.dsm and not io.file_exists(dsm_output_filename)) or \
-                self.rerun():
+            if not self.dems_exist(args, tree) or self.rerun():
 
                 products = []
 
@@ -96,21 +113,21 @@ class ODMDEMStage(types.ODM_Stage):
                 for _ in range(args.dem_gapfill_steps - 1):
                     radius_steps.append(radius_steps[-1] * 2) # 2 is arbitrary, maybe there's a better value?
 
-                for product in products:
-                    commands.create_dem(
-                            dem_input,
-                            product,
-                            output_type='idw' if product == 'dtm' else 'max',
-                            radiuses=map(str, radius_steps),
-                            gapfill=args.dem_gapfill_steps > 0,
-                            outdir=odm_dem_root,
-                            resolution=resolution / 100.0,
-                            decimation=args.dem_decimation,
-                            verbose=args.verbose,
-                            max_workers=args.max_concurrency,
-                            keep_unfilled_copy=args.dem_euclidean_map
-                        )
+                # Generate all products in a single pass over the point cloud
+                commands.create_dems(
+                        dem_input,
+                        [(product, 'idw' if product == 'dtm' else 'max') for product in products],
+                        radiuses=map(str, radius_steps),
+                        gapfill=args.dem_gapfill_steps > 0,
+                        outdir=odm_dem_root,
+                        resolution=resolution / 100.0,
+                        decimation=args.dem_decimation,
+                        verbose=args.verbose,
+                        max_workers=args.max_concurrency,
+                        keep_unfilled_copy=args.dem_euclidean_map
+                    )
 
+                for product in products:
                     dem_geotiff_path = os.path.join(odm_dem_root, "{}.tif".format(product))
                     bounds_file_path = os.path.join(tree.odm_georeferencing, 'odm_georeferenced_model.bounds.gpkg')
 
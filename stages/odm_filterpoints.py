@@ -8,6 +8,9 @@ from opendm import point_cloud
 from opendm import types
 
 class ODMFilterPoints(types.ODM_Stage):
+    def outputs_exist(self, args, tree):
+        return io.file_exists(tree.filtered_point_cloud)
+
     def process(self, args, outputs):
         tree = outputs['tree']
         reconstruction = outputs['reconstruction']
@@ -15,7 +18,7 @@ class ODMFilterPoints(types.ODM_Stage):
         if not os.path.exists(tree.odm_filterpoints): system.mkdir_p(tree.odm_filterpoints)
 
         # check if reconstruction was done before
-        if not io.file_exists(tree.filtered_point_cloud) or self.rerun():
+        if not self.outputs_exist(args, tree) or self.rerun():
             if args.fast_orthophoto:
                 inputPointCloud = os.path.join(tree.opensfm, 'reconstruction.ply')
             elif args.use_opensfm_dense:
@@ -1,4 +1,5 @@
 import os
+import glob
 import struct
 import pipes
 
@@ -11,16 +12,8 @@ from opendm.cropper import Cropper
 from opendm import point_cloud
 
 class ODMGeoreferencingStage(types.ODM_Stage):
-    def process(self, args, outputs):
-        tree = outputs['tree']
-        reconstruction = outputs['reconstruction']
-
-        doPointCloudGeo = True
-        transformPointCloud = True
-        verbose = '-verbose' if self.params.get('verbose') else ''
-
-        class nonloc:
-            runs = []
+    def georeferencing_runs(self, args, tree, multi_camera=None):
+        runs = []
 
         def add_run(primary=True, band=None):
             subdir = ""
@@ -32,28 +25,52 @@ class ODMGeoreferencingStage(types.ODM_Stage):
             # for the point cloud. If we use the 3D model transform,
             # DEMs and orthophoto might not align!
             if not args.use_3dmesh:
-                nonloc.runs += [{
+                runs.append({
                     'georeferencing_dir': os.path.join(tree.odm_25dgeoreferencing, subdir),
                     'texturing_dir': os.path.join(tree.odm_25dtexturing, subdir),
-                }]
+                })
             
             if not args.skip_3dmodel and (primary or args.use_3dmesh):
-                nonloc.runs += [{
+                runs.append({
                     'georeferencing_dir': tree.odm_georeferencing,
                     'texturing_dir': os.path.join(tree.odm_texturing, subdir),
-                }]
+                })
         
-        if reconstruction.multi_camera:
-            for band in reconstruction.multi_camera:
-                primary = band == reconstruction.multi_camera[0]
+        if multi_camera:
+            for band in multi_camera:
+                primary = band == multi_camera[0]
                 add_run(primary, band['name'].lower())
         else:
             add_run()
 
-        progress_per_run = 100.0 / len(nonloc.runs)
+        return runs
+
+    def run_done(self, tree, r):
+        return io.file_exists(os.path.join(r['texturing_dir'], tree.odm_georeferencing_model_obj_geo)) and \
+               io.file_exists(tree.odm_georeferencing_model_laz)
+
+    def outputs_exist(self, args, tree):
+        # Multi camera datasets also have one output per band, not checked here
+        if glob.glob(os.path.join(tree.opensfm, "undistorted", "reconstruction_*.nvm")):
+            return False
+
+        return io.file_exists(tree.odm_georeferencing_model_laz) and \
+               all(self.run_done(tree, r) for r in self.georeferencing_runs(args, tree))
+
+    def process(self, args, outputs):
+        tree = outputs['tree']
+        reconstruction = outputs['reconstruction']
+
+        doPointCloudGeo = True
+        transformPointCloud = True
+        verbose = '-verbose' if self.params.get('verbose') else ''
+
+        runs = self.georeferencing_runs(args, tree, reconstruction.multi_camera)
+
+        progress_per_run = 100.0 / len(runs)
         progress = 0.0
 
-        for r in nonloc.runs:
+        for r in runs:
             if not io.dir_exists(r['georeferencing_dir']):
                 system.mkdir_p(r['georeferencing_dir'])
 
@@ -63,8 +80,7 @@ class ODMGeoreferencingStage(types.ODM_Stage):
             odm_georeferencing_transform_file = os.path.join(r['georeferencing_dir'], tree.odm_georeferencing_transform_file)
             odm_georeferencing_model_txt_geo_file = os.path.join(r['georeferencing_dir'], tree.odm_georeferencing_model_txt_geo)
 
-            if not io.file_exists(odm_georeferencing_model_obj_geo) or \
-               not io.file_exists(tree.odm_georeferencing_model_laz) or self.rerun():
+            if not self.run_done(tree, r) or self.rerun():
 
                 # odm_georeference definitions
                 kwargs = {
@@ -9,6 +9,15 @@ from opendm import gsd
 from opendm import types
 
 class ODMeshingStage(types.ODM_Stage):
+    def mesh_exists(self, args, tree):
+        return args.skip_3dmodel or io.file_exists(tree.odm_mesh)
+
+    def mesh_25d_exists(self, args, tree):
+        return args.use_3dmesh or io.file_exists(tree.odm_25dmesh)
+
+    def outputs_exist(self, args, tree):
+        return self.mesh_exists(args, tree) and self.mesh_25d_exists(args, tree)
+
     def process(self, args, outputs):
         tree = outputs['tree']
         reconstruction = outputs['reconstruction']
@@ -18,7 +27,7 @@ class ODMeshingStage(types.ODM_Stage):
 
         # Create full 3D model unless --skip-3dmodel is set
         if not args.skip_3dmodel:
-          if not io.file_exists(tree.odm_mesh) or self.rerun():
+          if not self.mesh_exists(args, tree) or self.rerun():
               log.ODM_INFO('Writing ODM Mesh file in: %s' % tree.odm_mesh)
 
               mesh.screened_poisson_reconstruction(tree.filtered_point_cloud,
@@ -39,7 +48,7 @@ class ODMeshingStage(types.ODM_Stage):
         # Always generate a 2.5D mesh
         # unless --use-3dmesh is set.
         if not args.use_3dmesh:
-          if not io.file_exists(tree.odm_25dmesh) or self.rerun():
+          if not self.mesh_25d_exists(args, tree) or self.rerun():
 
               log.ODM_INFO('Writing ODM 2.5D Mesh file in: %s' % tree.odm_25dmesh)
               ortho_resolution = gsd.cap_resolution(args.orthophoto_resolution, tree.opensfm_reconstruction, 
@@ -13,6 +13,9 @@ from pipes import quote
 from opendm import pseudogeo
 
 class ODMOrthoPhotoStage(types.ODM_Stage):
+    def outputs_exist(self, args, tree):
+        return io.file_exists(tree.odm_orthophoto_tif)
+
     def process(self, args, outputs):
         tree = outputs['tree']
         reconstruction = outputs['reconstruction']
@@ -21,7 +24,7 @@ class ODMOrthoPhotoStage(types.ODM_Stage):
         # define paths and create working directories
         system.mkdir_p(tree.odm_orthophoto)
 
-        if not io.file_exists(tree.odm_orthophoto_tif) or self.rerun():
+        if not self.outputs_exist(args, tree) or self.rerun():
             gsd_error_estimate = 0.1
             ignore_resolution = False
             if not reconstruction.is_georeferenced():
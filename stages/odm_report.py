@@ -9,14 +9,20 @@ import json
 
 
 class ODMReport(types.ODM_Stage):
+    def shots_geojson(self, tree):
+        return os.path.join(tree.odm_report, "shots.geojson")
+
+    def outputs_exist(self, args, tree):
+        return io.file_exists(self.shots_geojson(tree))
+
     def process(self, args, outputs):
         tree = outputs['tree']
         reconstruction = outputs['reconstruction']
 
         if not os.path.exists(tree.odm_report): system.mkdir_p(tree.odm_report)
 
-        shots_geojson = os.path.join(tree.odm_report, "shots.geojson")
-        if not io.file_exists(shots_geojson) or self.rerun():
+        shots_geojson = self.shots_geojson(tree)
+        if not self.outputs_exist(args, tree) or self.rerun():
             # Extract geographical camera shots
             if reconstruction.is_georeferenced():
                 shots = get_geojson_shots_from_opensfm(tree.opensfm_reconstruction, tree.opensfm_transformation, reconstruction.get_proj_srs())    
@@ -14,6 +14,19 @@ from opendm.osfm import OSFMContext
 from opendm import multispectral
 
 class ODMOpenSfMStage(types.ODM_Stage):
+    def output_file(self, args, tree):
+        if args.fast_orthophoto:
+            return os.path.join(tree.opensfm, 'reconstruction.ply')
+        elif args.use_opensfm_dense:
+            return tree.opensfm_model
+        else:
+            return tree.opensfm_reconstruction
+
+    def outputs_exist(self, args, tree):
+        return io.file_exists(tree.opensfm_reconstruction) and \
+               io.file_exists(tree.opensfm_reconstruction_nvm) and \
+               io.file_exists(self.output_file(args, tree))
+
     def process(self, args, outputs):
         tree = outputs['tree']
         reconstruction = outputs['reconstruction']
@@ -45,13 +58,7 @@ class ODMOpenSfMStage(types.ODM_Stage):
             self.next_stage = None
             return
 
-        if args.fast_orthophoto:
-            output_file = octx.path('reconstruction.ply')
-        elif args.use_opensfm_dense:
-            output_file = tree.opensfm_model
-        else:
-            output_file = tree.opensfm_reconstruction
-
+        output_file = self.output_file(args, tree)
         updated_config_flag_file = octx.path('updated_config.txt')
 
         # Make sure it's capped by the depthmap-resolution arg,
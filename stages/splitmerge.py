@@ -13,14 +13,20 @@ from opendm.dem import pdal, utils
 from opendm.dem.merge import euclidean_merge_dems
 from opensfm.large import metadataset
 from opendm.cropper import Cropper
-from opendm.concurrency import get_max_memory
+from opendm.concurrency import get_max_memory, parallel_map
 from opendm.remote import LocalRemoteExecutor
 from opendm.shots import merge_geojson_shots
 from opendm import point_cloud
+from opendm import context
 from pipes import quote
+import threading
 
 
 class ODMSplitStage(types.ODM_Stage):
+    def outputs_exist(self, args, tree):
+        # Split-merge runs are not checked, they always run
+        return not io.dir_exists(tree.submodels_path)
+
     def process(self, args, outputs):
         tree = outputs['tree']
         reconstruction = outputs['reconstruction']
@@ -206,17 +212,33 @@ class ODMSplitStage(types.ODM_Stage):
 
                 # Run ODM toolchain for each submodel
                 if local_workflow:
+                    submodels = []
                     for sp in submodel_paths:
                         sp_octx = OSFMContext(sp)
+                        argv = get_submodel_argv(args, tree.submodels_path, sp_octx.name())
+                        submodels.append((sp_octx.name(), " ".join(map(quote, argv))))
 
-                        log.ODM_INFO("========================")
-                        log.ODM_INFO("Processing %s" % sp_octx.name()) 
-                        log.ODM_INFO("========================")
+                    log_lock = threading.Lock()
 
-                        argv = get_submodel_argv(args, tree.submodels_path, sp_octx.name())
+                    def run_submodel(submodel):
+                        name, cmd = submodel
+
+                        with log_lock:
+                            log.ODM_INFO("========================")
+                            log.ODM_INFO("Processing %s" % name)
+                            log.ODM_INFO("========================")
 
                         # Re-run the ODM toolchain on the submodel
-                        system.run(" ".join(map(quote, argv)), env_vars=os.environ.copy())
+                        system.run(cmd, env_vars=os.environ.copy())
+
+                    # Submodels are independent, process several at once
+                    # while each submodel uses up to max_concurrency cores.
+                    # The work happens in subprocesses, so threads are enough.
+                    max_workers = max(1, min(len(submodels), context.num_cores // max(1, args.max_concurrency)))
+                    log.ODM_INFO("Processing %s submodels, %s at a time" % (len(submodels), max_workers))
+
+                    # The first failure stops new submodels from being started
+                    parallel_map(run_submodel, submodels, max_workers)
                 else:
                     lre.set_projects([os.path.abspath(os.path.join(p, "..")) for p in submodel_paths])
                     lre.run_toolchain()
@@ -233,6 +255,10 @@ class ODMSplitStage(types.ODM_Stage):
 
 
 class ODMMergeStage(types.ODM_Stage):
+    def outputs_exist(self, args, tree):
+        # Split-merge runs are not checked, they always run
+        return not io.dir_exists(tree.submodels_path)
+
     def process(self, args, outputs):
         tree = outputs['tree']
         reconstruction = outputs['reconstruction']
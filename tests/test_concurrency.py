@@ -0,0 +1,52 @@
+import time
+import unittest
+import threading
+from opendm import system
+from opendm.concurrency import parallel_map
+
+class TestConcurrency(unittest.TestCase):
+    def setUp(self):
+        self.run = system.run
+        self.calls = []
+        self.lock = threading.Lock()
+        self.started = threading.Event()
+        self.fail_when_started = False
+
+        def run(cmd, env_paths=None, env_vars={}):
+            with self.lock:
+                self.calls.append(cmd)
+            if cmd == 'submodel_0000':
+                if self.fail_when_started:
+                    self.started.wait(5)
+                raise Exception('Child returned 1')
+            self.started.set()
+            time.sleep(0.2)
+            return cmd
+        system.run = run
+
+    def tearDown(self):
+        system.run = self.run
+
+    def run_submodel(self, name):
+        return system.run(name)
+
+    def test_parallel_map(self):
+        submodels = ['submodel_%04d' % i for i in range(1, 5)]
+        self.assertEqual(parallel_map(self.run_submodel, submodels, 2), submodels)
+        self.assertEqual(sorted(self.calls), submodels)
+
+    def test_parallel_map_stops_on_error(self):
+        submodels = ['submodel_%04d' % i for i in range(6)]
+
+        # The remaining submodels are not started
+        self.assertRaises(Exception, parallel_map, self.run_submodel, submodels, 1)
+        self.assertEqual(self.calls, ['submodel_0000'])
+
+        # The submodel that was already running finishes
+        del self.calls[:]
+        self.fail_when_started = True
+        self.assertRaises(Exception, parallel_map, self.run_submodel, submodels, 2)
+        self.assertEqual(sorted(self.calls), ['submodel_0000', 'submodel_0001'])
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,295 @@
+import os
+import json
+import shutil
+import struct
+import tempfile
+import unittest
+from opendm.dem import pdal
+
+class TestDemPdal(unittest.TestCase):
+    def setUp(self):
+        pass
+
+    def test_gdal_multi(self):
+        outputs = [
+            {'filename': 'dsm.tif', 'output_type': 'max', 'limits': pdal.classification_limits(2, equality='max')},
+            {'filename': 'dtm.tif', 'output_type': 'idw', 'limits': pdal.classification_limits(2)},
+        ]
+        p = pdal.json_gdal_multi(['/tmp/a.laz'], outputs, 0.5, 0.1, decimation=2)['pipeline']
+
+        # Shared reader/decimation block is read once
+        self.assertEqual([s['type'] for s in p], ['readers.las', 'filters.decimation',
+                                                  'filters.range', 'writers.gdal',
+                                                  'filters.range', 'writers.gdal',
+                                                  'filters.merge'])
+        self.assertEqual(p[1]['tag'], 'in')
+
+        # Each branch reads from the shared block
+        self.assertEqual(p[2]['inputs'], ['in'])
+        self.assertEqual(p[2]['limits'], 'Classification[:2]')
+        self.assertEqual(p[3]['inputs'], [p[2]['tag']])
+        self.assertEqual(p[3]['filename'], 'dsm.tif')
+        self.assertEqual(p[4]['inputs'], ['in'])
+        self.assertEqual(p[4]['limits'], 'Classification[2:2]')
+        self.assertEqual(p[5]['inputs'], [p[4]['tag']])
+        self.assertEqual(p[5]['output_type'], 'idw')
+
+        # Single endpoint
+        self.assertEqual(p[6]['inputs'], [p[3]['tag'], p[5]['tag']])
+
+        # Single output, no merge
+        p = pdal.json_gdal_multi(['/tmp/a.laz'], outputs[:1], 0.5, 0.1)['pipeline']
+        self.assertEqual([s['type'] for s in p], ['readers.las', 'filters.range', 'writers.gdal'])
+
+    def test_gdal_pipelines(self):
+        outputs = [
+            {'filename': 'dsm.tif', 'output_type': 'max'},
+            {'filename': 'dtm.tif', 'output_type': 'idw', 'limits': pdal.classification_limits(2)},
+        ]
+        bindings = pdal.pdal_bindings
+        try:
+            # One pipeline per output, with and without the Python bindings
+            for b in (object(), None):
+                pdal.pdal_bindings = b
+                ps = pdal.json_gdal_pipelines(['/tmp/a.laz'], outputs, 0.5, 0.1)
+                self.assertEqual([[s['type'] for s in p['pipeline']] for p in ps],
+                                 [['readers.las', 'writers.gdal'],
+                                  ['readers.las', 'filters.range', 'writers.gdal']])
+                self.assertEqual([p['pipeline'][-1]['filename'] for p in ps], ['dsm.tif', 'dtm.tif'])
+        finally:
+            pdal.pdal_bindings = bindings
+
+    def test_poisson_sample(self):
+        pipelines = []
+        run_pipeline = pdal.run_pipeline
+        try:
+            pdal.run_pipeline = lambda json, verbose=False: pipelines.append(json)
+            pdal.run_poisson_sample('/tmp/a.laz', '/tmp/sampled.laz', 0.05)
+        finally:
+            pdal.run_pipeline = run_pipeline
+
+        # All points are sampled once, into a file the tiles read
+        p = pipelines[0]['pipeline']
+        self.assertEqual([s['type'] for s in p], ['readers.las', 'filters.sample', 'writers.las'])
+        self.assertEqual(p[1]['radius'], 0.05)
+        self.assertEqual(p[2]['filename'], '/tmp/sampled.laz')
+        self.assertEqual(p[2]['forward'], 'all')
+
+    def test_decimation_sample_radius(self):
+        # 1M points over 100x100, average spacing 0.1
+        self.assertAlmostEqual(pdal.decimation_sample_radius(4, 1000000, 10000.0), 0.2)
+        self.assertAlmostEqual(pdal.decimation_sample_radius(100, 1000000, 10000.0), 1.0)
+        self.assertIsNone(pdal.decimation_sample_radius(4, None, 10000.0))
+        self.assertIsNone(pdal.decimation_sample_radius(4, 1000000, 0))
+
+    def test_readers(self):
+        files = ['a.laz', '../x/./b.las', '/abs//p/../c.ply']
+        p = pdal.json_add_readers(pdal.json_base(), files)['pipeline']
+        self.assertEqual([s.get('filename') for s in p], [os.path.abspath(f) for f in files] + [None])
+        self.assertEqual([s['type'] for s in p], ['readers.las', 'readers.las', 'readers.ply', 'filters.merge'])
+
+        # No filesystem lookups per reader
+        isdir = os.path.isdir
+        def fail(path):
+            raise AssertionError("isdir(%s) called" % path)
+        try:
+            os.path.isdir = fail
+            p = pdal.json_add_readers(pdal.json_base(), files + ['/x/ept.json'])['pipeline']
+        finally:
+            os.path.isdir = isdir
+        self.assertEqual(p[3], {'type': 'readers.ept', 'filename': '/x/ept.json'})
+
+    def test_pipeline_order(self):
+        d = pdal.json_base()
+        pdal.json_add_readers(d, ['a.laz'])
+        pdal.json_add_decimation_filter(d, 2)
+        pdal.json_add_classification_filter(d, 2)
+        pdal.json_add_gdal_writer(d, 'dtm.tif', 'idw', 0.5)
+        self.assertEqual([s['type'] for s in d['pipeline']], ['readers.las', 'filters.decimation', 'filters.range', 'writers.gdal'])
+
+        d = pdal.json_base()
+        pdal.json_add_reader(d, 'a.laz')
+        pdal.json_add_smrf_filter(d, 1.25, 0.15, 0.5, 18.0)
+        pdal.json_add_las_writer(d, 'a.laz')
+        self.assertEqual([s['type'] for s in d['pipeline']], ['readers.las', 'filters.smrf', 'writers.las'])
+        self.assertEqual(d['pipeline'][-1]['compression'], 'laszip')
+
+    def test_las_point_count(self):
+        d = tempfile.mkdtemp()
+        try:
+            # LAS 1.2: 32bit count at offset 107, 227 bytes header
+            h = bytearray(227)
+            h[0:4] = b'LASF'
+            h[24:26] = struct.pack('<BB', 1, 2)
+            h[107:111] = struct.pack('<I', 12345)
+            f12 = os.path.join(d, '12.las')
+            with open(f12, 'wb') as f:
+                f.write(bytes(h))
+            self.assertEqual(pdal.las_point_count(f12), 12345)
+
+            # LAS 1.4: 64bit count at offset 247, the legacy count is zero
+            h = bytearray(375)
+            h[0:4] = b'LASF'
+            h[24:26] = struct.pack('<BB', 1, 4)
+            h[247:255] = struct.pack('<Q', 5000000000)
+            f14 = os.path.join(d, '14.las')
+            with open(f14, 'wb') as f:
+                f.write(bytes(h))
+            self.assertEqual(pdal.las_point_count(f14), 5000000000)
+            self.assertEqual(pdal.point_count(f14), 5000000000)
+
+            fbad = os.path.join(d, 'bad.las')
+            with open(fbad, 'wb') as f:
+                f.write(b'ply\n')
+            self.assertRaises(Exception, pdal.las_point_count, fbad)
+        finally:
+            shutil.rmtree(d)
+
+    def test_json_dumps(self):
+        d = pdal.json_gdal_multi(['/tmp/a.laz'], [{'filename': 'dsm.tif', 'output_type': 'max'}], '0.5', 0.1)
+        self.assertEqual(json.loads(pdal.json_dumps(d).decode('utf-8')), d)
+
+        # Float subclasses (e.g. numpy.float64 resolutions from gsd.py)
+        class Float(float):
+            pass
+        d = pdal.json_gdal_multi(['/tmp/a.laz'], [{'filename': 'dsm.tif', 'output_type': 'max'}], Float(0.5), Float(0.1))
+        p = json.loads(pdal.json_dumps(d).decode('utf-8'))['pipeline']
+        self.assertEqual(p[-1]['resolution'], 0.1)
+        self.assertEqual(p[-1]['radius'], 0.5)
+
+    def test_range(self):
+        p = pdal.json_add_range(pdal.json_base(), {'Z': '[:100]', 'Classification': '[2:2]', 'ScanAngleRank': '[-20:20]'})['pipeline']
+        self.assertEqual(p, [{'type': 'filters.range', 'limits': 'Classification[2:2],ScanAngleRank[-20:20],Z[:100]'}])
+
+        p = pdal.json_add_classification_filter(pdal.json_base(), 2, equality='max')['pipeline']
+        self.assertEqual(p[0]['limits'], 'Classification[:2]')
+
+    def test_ept_reader(self):
+        ept_dir = tempfile.mkdtemp()
+        try:
+            with open(os.path.join(ept_dir, 'ept.json'), 'w') as f:
+                f.write('{}')
+            self.assertTrue(pdal.is_ept(ept_dir))
+            self.assertFalse(pdal.is_ept('/tmp/a.laz'))
+
+            # Only current if built after the point cloud
+            laz = os.path.join(ept_dir, 'a.laz')
+            with open(laz, 'w') as f:
+                f.write('laz')
+            os.utime(os.path.join(ept_dir, 'ept.json'), (1000, 1000))
+            os.utime(laz, (2000, 2000))
+            self.assertFalse(pdal.is_ept_current(ept_dir, laz))
+            os.utime(os.path.join(ept_dir, 'ept.json'), (3000, 3000))
+            self.assertTrue(pdal.is_ept_current(ept_dir, laz))
+            self.assertFalse(pdal.is_ept_current(ept_dir, '/tmp/missing.laz'))
+
+            p = pdal.json_add_reader(pdal.json_base(), ept_dir)['pipeline']
+            self.assertEqual(p, [{'type': 'readers.ept', 'filename': os.path.join(ept_dir, 'ept.json')}])
+
+            bounds = {'minx': 0, 'maxx': 10, 'miny': 20, 'maxy': 30}
+            p = pdal.json_gdal_multi([ept_dir], [{'filename': 'dsm.tif', 'output_type': 'max'}], '0.5', 0.1, bounds)['pipeline']
+            self.assertEqual(p[0]['type'], 'readers.ept')
+            self.assertEqual(p[0]['filename'], os.path.join(ept_dir, 'ept.json'))
+
+            # Tile bounds, plus the writer radius
+            self.assertEqual(p[0]['bounds'], '([-0.5,10.5],[19.5,30.5])')
+            self.assertEqual(p[1]['bounds'], '([0,10],[20,30])')
+        finally:
+            shutil.rmtree(ept_dir)
+
+    def test_run_pipeline_bindings(self):
+        calls = []
+        messages = []
+        pipelines = []
+
+        class Pipeline(object):
+            streamable = True
+            log = 'pipeline log'
+
+            def __init__(self, spec):
+                self.loglevel = None
+                pipelines.append(self)
+                calls.append(('init', json.loads(spec)))
+
+            def execute(self):
+                calls.append(('execute',))
+
+            def execute_streaming(self, chunk_size):
+                calls.append(('execute_streaming', chunk_size))
+
+            def iterator(self, chunk_size, prefetch):
+                calls.append(('iterator', chunk_size, prefetch))
+                return iter([None, None])
+
+        class Bindings(object):
+            pass
+
+        class Log(object):
+            def ODM_INFO(self, msg):
+                messages.append(('info', msg))
+            ODM_DEBUG = ODM_INFO
+
+            def ODM_WARNING(self, msg):
+                messages.append(('warning', msg))
+
+        bindings = Bindings()
+        bindings.Pipeline = Pipeline
+        saved = (pdal.pdal_bindings, pdal.log, os.environ.get('ODM_DEM_CHUNK'), os.environ.get('ODM_DEM_PREFETCH'))
+        d = pdal.json_gdal_multi(['/tmp/a.laz'], [{'filename': 'dsm.tif', 'output_type': 'max'}], '0.5', 0.1)
+
+        def run(chunk=None, prefetch=None):
+            for name, value in (('ODM_DEM_CHUNK', chunk), ('ODM_DEM_PREFETCH', prefetch)):
+                if value is None:
+                    os.environ.pop(name, None)
+                else:
+                    os.environ[name] = value
+            del calls[:]
+            del messages[:]
+            pdal.run_pipeline(d)
+            self.assertEqual(calls[0], ('init', d))
+            return calls[1:]
+
+        try:
+            pdal.pdal_bindings = bindings
+            pdal.log = Log()
+
+            # Defaults: stream 100000 points at a time, without prefetch
+            self.assertEqual(run(), [('execute_streaming', 100000)])
+            self.assertEqual(run(chunk='5000'), [('execute_streaming', 5000)])
+            self.assertEqual(messages, [])
+
+            # Invalid and out of range values
+            self.assertEqual(run(chunk='abc'), [('execute_streaming', 100000)])
+            self.assertEqual([m[0] for m in messages], ['warning'])
+            self.assertEqual(run(chunk='0', prefetch='-3'), [('execute_streaming', 1)])
+
+            # Prefetching goes through the iterator
+            self.assertEqual(run(chunk='5000', prefetch='2'), [('iterator', 5000, 2)])
+            self.assertEqual(run(prefetch='x'), [('execute_streaming', 100000)])
+            self.assertEqual([m[0] for m in messages], ['warning'])
+
+            # Older bindings without iterator
+            del Pipeline.iterator
+            self.assertEqual(run(prefetch='2'), [('execute_streaming', 100000)])
+
+            # Pipelines that cannot stream
+            Pipeline.streamable = False
+            self.assertEqual(run(chunk='5000', prefetch='2'), [('execute',)])
+            self.assertEqual(messages, [])
+            self.assertIsNone(pipelines[-1].loglevel)
+
+            # Verbose runs print the pipeline and the PDAL log
+            pdal.run_pipeline(d, verbose=True)
+            self.assertEqual(pipelines[-1].loglevel, 8)
+            self.assertEqual(messages[-1], ('info', 'pipeline log'))
+            self.assertEqual(json.loads(messages[0][1]), d)
+        finally:
+            pdal.pdal_bindings, pdal.log = saved[:2]
+            for name, value in zip(('ODM_DEM_CHUNK', 'ODM_DEM_PREFETCH'), saved[2:]):
+                if value is None:
+                    os.environ.pop(name, None)
+                else:
+                    os.environ[name] = value
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,81 @@
+import os
+import shutil
+import tempfile
+import unittest
+from opendm import config
+from stages.odm_app import ODMApp
+
+class TestODMApp(unittest.TestCase):
+    def setUp(self):
+        self.project_path = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.project_path)
+
+    def create_app(self, *argv):
+        args = config.config(["--project-path", self.project_path] + list(argv))
+        app = ODMApp(args)
+
+        # Do not run the stages
+        app.first_stage.run = lambda: None
+        return app
+
+    def set_outputs_exist(self, app, exist=True):
+        for stage in app.stages():
+            stage.outputs_exist = lambda args, tree: exist
+
+    def test_options_hash(self):
+        h = self.create_app().options_hash()
+        self.assertEqual(self.create_app().options_hash(), h)
+
+        # Rerun flags are not processing options
+        self.assertEqual(self.create_app("--rerun-from", "odm_dem").options_hash(), h)
+        self.assertNotEqual(self.create_app("--dsm").options_hash(), h)
+
+    def test_is_up_to_date(self):
+        app = self.create_app()
+        self.set_outputs_exist(app)
+        self.assertFalse(app.is_up_to_date())
+
+        app.execute()
+        self.assertTrue(os.path.exists(app.done_file))
+        self.assertTrue(app.is_up_to_date())
+
+        # Different options
+        app = self.create_app("--dsm")
+        self.set_outputs_exist(app)
+        self.assertFalse(app.is_up_to_date())
+
+        # Rerun requested
+        app = self.create_app("--rerun-all")
+        self.set_outputs_exist(app)
+        self.assertFalse(app.is_up_to_date())
+
+        # Missing stage output
+        app = self.create_app()
+        self.set_outputs_exist(app)
+        orthophoto = [s for s in app.stages() if s.name == 'odm_orthophoto'][0]
+        del orthophoto.outputs_exist
+        self.assertFalse(app.is_up_to_date())
+
+        os.makedirs(os.path.join(self.project_path, 'odm_orthophoto'))
+        with open(os.path.join(self.project_path, 'odm_orthophoto', 'odm_orthophoto.tif'), 'w') as f:
+            f.write('tif')
+        self.assertTrue(app.is_up_to_date())
+
+    def test_execute_marker(self):
+        app = self.create_app()
+        app.execute()
+        self.assertTrue(os.path.exists(app.done_file))
+
+        # Runs that stop early invalidate the previous run
+        app = self.create_app("--end-with", "odm_dem")
+        app.execute()
+        self.assertFalse(os.path.exists(app.done_file))
+
+        app = self.create_app("--rerun", "odm_dem")
+        app.execute()
+        self.assertFalse(os.path.exists(app.done_file))
+
+if __name__ == '__main__':
+    unittest.main()
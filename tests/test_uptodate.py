@@ -0,0 +1,72 @@
+import os
+import shutil
+import tempfile
+import unittest
+import argparse
+from opendm import uptodate
+
+class ODMStageMock:
+    def __init__(self, name, rerun=False, outputs_exist=True):
+        self.name = name
+        self._rerun = rerun
+        self._outputs_exist = outputs_exist
+        self.checked = False
+
+    def rerun(self):
+        return self._rerun
+
+    def outputs_exist(self, args, tree):
+        self.checked = True
+        return self._outputs_exist
+
+class TestUpToDate(unittest.TestCase):
+    def setUp(self):
+        self.project_path = tempfile.mkdtemp()
+        self.done_file = os.path.join(self.project_path, 'odm_done.txt')
+
+    def tearDown(self):
+        shutil.rmtree(self.project_path)
+
+    def args(self, **kwargs):
+        options = {'project_path': self.project_path, 'dsm': False, 'dsm_is_set': False,
+                   'rerun': None, 'rerun_all': False, 'rerun_from': None, 'end_with': 'odm_report', 'time': False}
+        options.update(kwargs)
+        return argparse.Namespace(**options)
+
+    def test_options_hash(self):
+        h = uptodate.options_hash(self.args())
+        self.assertEqual(uptodate.options_hash(self.args()), h)
+
+        # Rerun flags are not processing options
+        self.assertEqual(uptodate.options_hash(self.args(rerun_from=['odm_dem'], end_with='odm_dem')), h)
+        self.assertEqual(uptodate.options_hash(self.args(dsm_is_set=True)), h)
+        self.assertNotEqual(uptodate.options_hash(self.args(dsm=True)), h)
+
+    def test_is_up_to_date(self):
+        args = self.args()
+        stages = [ODMStageMock('dataset'), ODMStageMock('odm_orthophoto')]
+
+        # No previous complete run
+        self.assertFalse(uptodate.is_up_to_date(self.done_file, args, stages, None))
+
+        uptodate.mark_done(self.done_file, args)
+        self.assertTrue(uptodate.is_up_to_date(self.done_file, args, stages, None))
+        self.assertTrue(all(s.checked for s in stages))
+
+        # Different options
+        self.assertFalse(uptodate.is_up_to_date(self.done_file, self.args(dsm=True), stages, None))
+
+        # Rerun requested
+        self.assertFalse(uptodate.is_up_to_date(self.done_file, args, stages + [ODMStageMock('odm_dem', rerun=True)], None))
+
+        # Missing stage output
+        self.assertFalse(uptodate.is_up_to_date(self.done_file, args, stages + [ODMStageMock('odm_dem', outputs_exist=False)], None))
+
+        # Runs that stop early invalidate the previous run
+        uptodate.invalidate(self.done_file)
+        self.assertFalse(os.path.exists(self.done_file))
+        self.assertFalse(uptodate.is_up_to_date(self.done_file, args, stages, None))
+        uptodate.invalidate(self.done_file)
+
+if __name__ == '__main__':
+    unittest.main()